@@ -0,0 +1,40 @@
+"""店舗CSVをParquetに変換するスクリプト。
+
+Google Driveに置いているCSVをParquet（zstd圧縮）へ移行するための
+ワンショット変換ツールです。Parquetは列指向・圧縮済み・型情報付きなので、
+同じ内容でも転送サイズが1/5〜1/10、パースはトークナイズ不要で10倍以上速くなります。
+
+使い方:
+    python convert_to_parquet.py <CSVのパスまたはURL> <出力parquetパス>
+
+生成したファイルをDriveにアップロードし、slot_data_viewer_gdrive.py の
+store_files のIDを差し替えて DATA_FORMAT を "parquet" に変更してください。
+"""
+
+import sys
+
+import pandas as pd
+
+# アプリ本体をimportするとStreamlitの初期化が走るため、カラム定数はここで再定義する
+DATE_COL = "日付"
+DATE_FORMAT = "%Y-%m-%d"
+MODEL_COL = "機種名"
+STORE_COL = "店舗名"
+
+
+def convert(src: str, dst: str) -> None:
+    df = pd.read_csv(src, encoding="utf-8", parse_dates=[DATE_COL], date_format=DATE_FORMAT)
+    for col in (MODEL_COL, STORE_COL):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    # アプリのローダーが前提とする日付昇順をファイル側でも保証しておく
+    df = df.sort_values(DATE_COL, ignore_index=True)
+    df.to_parquet(dst, compression="zstd", index=False)
+    print(f"変換完了: {src} -> {dst} ({len(df)}行)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    convert(sys.argv[1], sys.argv[2])
@@ -0,0 +1,63 @@
+"""アプリで実際に使う文字だけを含むサブセットフォントを生成するスクリプト。
+
+Noto Sans CJK JP のフルOTF（約16MB）を毎回ダウンロードする代わりに、
+UIに現れる文字（ソース中の文字列リテラル + データに出る店舗名・機種名など）
+だけを含む noto_subset.ttf（通常200KB未満）を生成してリポジトリに同梱します。
+
+使い方:
+    pip install fonttools
+    python make_font_subset.py [追加文字を含むテキストファイル...]
+
+生成された noto_subset.ttf が存在すれば、アプリはダウンロードせずにそれを使います。
+"""
+
+import os
+import string
+import subprocess
+import sys
+import urllib.request
+
+FONT_URL = "https://github.com/googlefonts/noto-cjk/raw/main/Sans/OTF/Japanese/NotoSansCJKjp-Regular.otf"
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+FULL_FONT = os.path.join(SRC_DIR, "NotoSansCJKjp-Regular.otf")
+SUBSET_FONT = os.path.join(SRC_DIR, "noto_subset.ttf")
+APP_SOURCE = os.path.join(SRC_DIR, "slot_data_viewer_gdrive.py")
+
+
+def collect_chars(extra_files: list[str]) -> str:
+    """アプリのソースと追加ファイルから、サブセットに含める文字の集合を作ります。"""
+    chars = set(string.printable)
+    with open(APP_SOURCE, encoding="utf-8") as f:
+        chars.update(f.read())
+    for path in extra_files:
+        with open(path, encoding="utf-8") as f:
+            chars.update(f.read())
+    # 制御文字は除外
+    return "".join(sorted(c for c in chars if c.isprintable()))
+
+
+def main() -> None:
+    if not os.path.exists(FULL_FONT):
+        print("フルフォントをダウンロード中...")
+        urllib.request.urlretrieve(FONT_URL, FULL_FONT)
+
+    text = collect_chars(sys.argv[1:])
+    used_chars_path = os.path.join(SRC_DIR, "used_chars.txt")
+    with open(used_chars_path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+    subprocess.run(
+        [
+            "pyftsubset",
+            FULL_FONT,
+            f"--text-file={used_chars_path}",
+            f"--output-file={SUBSET_FONT}",
+        ],
+        check=True,
+    )
+    size_kb = os.path.getsize(SUBSET_FONT) / 1024
+    print(f"生成完了: {SUBSET_FONT} ({size_kb:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""店舗データから (機種, 表示列) 毎のピボットテーブルを事前計算するスクリプト。
+
+アプリはリクエスト毎に pivot(台番号×日付) を計算しますが、入力CSVが
+静的である以上この計算結果も静的です。バッチで cache/ 以下にparquetとして
+書き出しておけば、アプリ側（build_pivot）は数KBの読み込みで済みます。
+
+使い方:
+    python precompute_pivots.py <店舗名> <CSVのパスまたはURL> [出力ディレクトリ]
+
+出力ディレクトリの既定は、このスクリプトと同じ場所の cache/ です。
+"""
+
+import hashlib
+import os
+import sys
+
+import pandas as pd
+
+# アプリ本体をimportするとStreamlitの初期化が走るため、定数はここで再定義する
+DATE_COL = "日付"
+DATE_FORMAT = "%Y-%m-%d"
+MODEL_COL = "機種名"
+MACHINE_COL = "台番号"
+STORE_COL = "店舗名"
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+
+def pivot_cache_path(cache_dir: str, store: str, model: str, col: str) -> str:
+    """slot_data_viewer_gdrive.pivot_cache_path と同じ命名規則でパスを作ります。"""
+    key = hashlib.md5(f"{store}|{model}|{col}".encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"pivot_{key}.parquet")
+
+
+def precompute(store: str, src: str, cache_dir: str) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+    df = pd.read_csv(src, encoding="utf-8", parse_dates=[DATE_COL], date_format=DATE_FORMAT)
+    value_cols = [
+        c for c in df.columns
+        if c not in (DATE_COL, MODEL_COL, MACHINE_COL, STORE_COL)
+    ]
+    count = 0
+    for model, group in df.groupby(MODEL_COL):
+        for col in value_cols:
+            pivot_df = group.pivot(index=MACHINE_COL, columns=DATE_COL, values=col)
+            # parquetは文字列の列名しか持てないため日付はISO文字列にする
+            pivot_df.columns = pivot_df.columns.strftime(DATE_FORMAT)
+            pivot_df.to_parquet(pivot_cache_path(cache_dir, store, model, col))
+            count += 1
+    print(f"書き出し完了: {count}件のピボットを {cache_dir} に保存しました。")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        print(__doc__)
+        sys.exit(1)
+    out_dir = sys.argv[3] if len(sys.argv) == 4 else DEFAULT_CACHE_DIR
+    precompute(sys.argv[1], sys.argv[2], out_dir)
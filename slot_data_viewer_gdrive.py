@@ -1,21 +1,36 @@
 import streamlit as st
 st.set_page_config(page_title="スロットデータビューワー", layout="wide")
 
+import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
+import pyarrow.csv
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
-from matplotlib.colors import ListedColormap
+from matplotlib.collections import LineCollection
+import hashlib
+import io
 import os
-import math
+import threading
+import time
 import urllib.request
 import logging
 
+# numbaは任意依存。無ければpandasのrollingにフォールバックする。
+try:
+    import numba
+except ImportError:
+    numba = None
+
 # ---------- ログ設定 ----------
 logging.basicConfig(level=logging.INFO)
 
 # ---------- 定数設定 ----------
 FONT_URL = "https://github.com/googlefonts/noto-cjk/raw/main/Sans/OTF/Japanese/NotoSansCJKjp-Regular.otf"
 FONT_PATH = "/tmp/NotoSansCJKjp-Regular.otf"
+# リポジトリ同梱のサブセットフォント（make_font_subset.py で生成、数百KB）。
+# 存在すればフルOTF（約16MB）のダウンロードを丸ごと省略できる。
+SUBSET_FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "noto_subset.ttf")
 CUSTOM_COLORS = [
     "#4e79a7", "#59a14f", "#edc948", "#b07aa1", "#76b7b2",
     "#ff9da7", "#9c755f", "#bab0ac", "#17becf", "#bcbd22"
@@ -23,121 +38,412 @@ CUSTOM_COLORS = [
 
 # ---------- カラム名の定数 ----------
 DATE_COL = "日付"
+DATE_FORMAT = "%Y-%m-%d"
 MODEL_COL = "機種名"
 MACHINE_COL = "台番号"
 STORE_COL = "店舗名"
 
+# ---------- データ配置の設定 ----------
+# Drive上のデータ形式。convert_to_parquet.py でParquetへ移行したら "parquet" に変更する。
+DATA_FORMAT = "csv"
+
+# precompute_pivots.py が書き出す事前計算済みピボットの置き場所。
+# 存在すればリクエスト時のpivot計算を数KBのparquet読み込みに置き換えられる。
+PIVOT_CACHE_DIR = os.environ.get(
+    "PIVOT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+)
+
+def pivot_cache_path(store: str, model: str, col: str) -> str:
+    """事前計算済みピボットのファイルパスを返します（店舗・機種・列名から一意に決まる）。"""
+    key = hashlib.md5(f"{store}|{model}|{col}".encode("utf-8")).hexdigest()
+    return os.path.join(PIVOT_CACHE_DIR, f"pivot_{key}.parquet")
+
 # ---------- フォントの読み込み（キャッシュ付き） ----------
+# addfontはOTFを再パースするため、ホットリロード時の再実行も避けるためのガード
+_FONT_REGISTERED = False
+
+def _download_font(font_url: str, font_path: str) -> None:
+    """フォントをダウンロードします（部分書き込みを見せないよう一時ファイル経由）。"""
+    tmp_path = f"{font_path}.{threading.get_ident()}.part"
+    urllib.request.urlretrieve(font_url, tmp_path)
+    os.replace(tmp_path, font_path)
+
+# フォントのダウンロードは初回CSV読み込みと並行して進める（load_font内でjoinする）
+_font_thread = None
+if not os.path.exists(SUBSET_FONT_PATH) and not os.path.exists(FONT_PATH):
+    _font_thread = threading.Thread(
+        target=_download_font, args=(FONT_URL, FONT_PATH), daemon=True
+    )
+    _font_thread.start()
+
 @st.cache_resource
 def load_font(font_url: str, font_path: str) -> None:
     """
-    指定URLから日本語フォントをダウンロードし、Matplotlibに登録します。
+    日本語フォントをMatplotlibに登録します。
+
+    リポジトリにサブセットフォントが同梱されていればそれを使い、
+    なければ指定URLからフルフォントをダウンロードします。
     """
+    global _FONT_REGISTERED
+    if _FONT_REGISTERED:
+        return
     try:
-        if not os.path.exists(font_path):
-            logging.info("フォントをダウンロード中...")
-            urllib.request.urlretrieve(font_url, font_path)
+        if os.path.exists(SUBSET_FONT_PATH):
+            font_path = SUBSET_FONT_PATH
+        else:
+            if _font_thread is not None:
+                _font_thread.join()
+            if not os.path.exists(font_path):
+                logging.info("フォントをダウンロード中...")
+                _download_font(font_url, font_path)
         fm.fontManager.addfont(font_path)
         plt.rcParams['font.family'] = 'Noto Sans CJK JP'
+        _FONT_REGISTERED = True
         logging.info("フォントの読み込みに成功しました。")
     except Exception as e:
         logging.exception("フォントの読み込みに失敗しました。")
         raise e
 
+# フォントはプロセス毎に1回だけ登録される（cache_resource）。モジュール読み込み時に済ませる。
+load_font(FONT_URL, FONT_PATH)
+
 # ---------- CSVデータの読み込み（キャッシュ付き） ----------
-@st.cache_data
-def load_data(url: str) -> pd.DataFrame:
+# データ鮮度の上限（秒）。st.cache_dataのTTLと/tmpのparquetキャッシュの両方に適用する。
+# DriveのCSVは高々1日1回しか更新されないため24時間とする。
+DATA_TTL = 86400
+
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def load_data(file_id: str) -> pd.DataFrame:
     """
-    指定URLからCSVデータを読み込み、日付列をdatetime型に変換して返します。
-    
+    Google DriveのファイルIDからCSVデータを読み込み、日付列をdatetime型に変換して返します。
+
+    パース済みデータは /tmp/<file_id>.parquet にも保存し、プロセス再起動後の
+    コールドスタートでもCSVの再ダウンロード・再パースを省略します。
+    parquetキャッシュはmtimeがDATA_TTLを超えたら破棄して再取得します
+    （persist="disk"はTTLが無視され古いデータを返し続けるため使わない）。
+
     Parameters:
-        url (str): CSVデータのURL
+        file_id (str): Google DriveのファイルID
     Returns:
         pd.DataFrame: 読み込んだデータフレーム
     """
+    local_cache = f"/tmp/{file_id}.parquet"
     try:
+        if os.path.exists(local_cache) and time.time() - os.path.getmtime(local_cache) < DATA_TTL:
+            logging.info("ローカルのparquetキャッシュから読み込み中...")
+            return pd.read_parquet(local_cache)
         logging.info("CSVデータを読み込み中...")
-        df = pd.read_csv(url, encoding="utf-8")
-        df[DATE_COL] = pd.to_datetime(df[DATE_COL])
+        url = f"https://drive.google.com/uc?id={file_id}"
+        if DATA_FORMAT == "parquet":
+            # Parquetは型・カテゴリ・日付を保持しているので型変換は不要。
+            # ただし下流が前提とする日付昇順のソートはここでも保証する。
+            with urllib.request.urlopen(url) as resp:
+                df = pd.read_parquet(io.BytesIO(resp.read()))
+            return df.sort_values(DATE_COL, ignore_index=True)
+        # HTTPレスポンスを直接pyarrowのCSVリーダーに流し込む。ダウンロードと
+        # マルチスレッドのパースがブロック単位でオーバーラップするため、
+        # 「全量ダウンロード→シングルスレッドでパース」の直列コストがなくなる。
+        with urllib.request.urlopen(url) as resp:
+            table = pyarrow.csv.read_csv(
+                resp, read_options=pyarrow.csv.ReadOptions(use_threads=True)
+            )
+        df = table.to_pandas(date_as_object=False)
+        # 文字列列はcategory化してメモリ削減と後段の比較・groupbyを高速化する。
+        for col in (MODEL_COL, STORE_COL):
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+        # 台番号は数千程度なのでint32で十分。groupby/uniqueのハッシュも軽くなる。
+        if pd.api.types.is_integer_dtype(df[MACHINE_COL]):
+            df[MACHINE_COL] = df[MACHINE_COL].astype("int32")
+        # 数値列はfloat32/int32へダウンキャストする。持玉・差玉の値域（高々数十万）
+        # ではfloat32で精度劣化はなく、pivot/rolling/描画のメモリ帯域が半分になる。
+        for col in df.select_dtypes(include="float64").columns:
+            df[col] = df[col].astype(np.float32)
+        for col in df.select_dtypes(include="int64").columns:
+            if df[col].abs().max() < 2**31:
+                df[col] = df[col].astype(np.int32)
+        # pyarrowがISO形式なら日付型まで推定してくれる。文字列のまま残った場合のみ変換する。
+        if not pd.api.types.is_datetime64_any_dtype(df[DATE_COL]):
+            try:
+                df[DATE_COL] = pd.to_datetime(df[DATE_COL], format=DATE_FORMAT, cache=True)
+            except ValueError:
+                logging.warning("日付列が %s 形式ではないため、フォーマット推定にフォールバックします。", DATE_FORMAT)
+                df[DATE_COL] = pd.to_datetime(df[DATE_COL], cache=True)
+        # 日付昇順でグローバルにソートしておく。フィルタは行順を保つため、
+        # 下流の台別スライスで都度sort_valuesする必要がなくなる。
+        df = df.sort_values(DATE_COL, ignore_index=True)
+        try:
+            df.to_parquet(local_cache, compression="zstd")
+        except OSError:
+            logging.warning("parquetキャッシュの書き込みに失敗しました。", exc_info=True)
         logging.info("CSVデータの読み込みに成功しました。")
         return df
     except Exception as e:
         logging.exception("CSVデータの読み込みでエラーが発生しました。")
         raise e
 
+# ---------- 機種別データの抽出・ピボット（キャッシュ付き） ----------
+def _hash_dataframe(df: pd.DataFrame) -> tuple:
+    """
+    st.cache_data用の軽量なDataFrameハッシュ。既定のpickleベースの
+    ハッシュより速い、形状+列名+行ハッシュ合計のタプルを返します。
+    """
+    return (df.shape, tuple(df.columns), pd.util.hash_pandas_object(df, index=False).sum())
+
+_DF_HASH_FUNCS = {pd.DataFrame: _hash_dataframe}
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def filter_by_model(df: pd.DataFrame, model: str) -> pd.DataFrame:
+    """
+    指定機種の行だけを抽出して返します。リラン毎の全件スキャンを避けるためキャッシュします。
+    インデックスは0始まりに振り直します（iloc前提の下流処理と一致させるため）。
+    """
+    return df[df[MODEL_COL] == model].reset_index(drop=True)
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def sorted_machines(filtered_df: pd.DataFrame) -> tuple:
+    """
+    台番号の昇順一覧を返します。リラン毎のunique+ソートを避けるためキャッシュします。
+    """
+    return tuple(np.sort(filtered_df[MACHINE_COL].unique()).tolist())
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def machine_indices(filtered_df: pd.DataFrame) -> dict:
+    """
+    台番号→行位置配列のマップを返します。台の切り替え毎のO(N)ブールマスクを
+    O(1)のハッシュ参照+fancy indexに置き換えるためのものです。
+    """
+    return dict(filtered_df.groupby(MACHINE_COL, sort=False).indices)
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def build_pivot(filtered_df: pd.DataFrame, heatmap_col: str, store: str, model: str) -> pd.DataFrame:
+    """
+    台番号×日付のピボットテーブルを作成します。(機種, 表示列) 毎に1回だけ計算されます。
+
+    precompute_pivots.py による事前計算済みキャッシュがあればそれを読み、
+    リクエスト時の全件reshapeを省略します。
+    """
+    cache_path = pivot_cache_path(store, model, heatmap_col)
+    if os.path.exists(cache_path):
+        pivot_df = pd.read_parquet(cache_path)
+        # parquetの列名は文字列なので日付型に戻す
+        pivot_df.columns = pd.to_datetime(pivot_df.columns, format=DATE_FORMAT)
+        return pivot_df
+    # pivot()のPythonレベルの列・インデックス調整を避け、整数コードベースの
+    # groupby+unstackで組み立てる。(台番号, 日付)の重複行があっても落ちない
+    # （最後の行を採用する）という利点もある。
+    return (
+        filtered_df.groupby([MACHINE_COL, DATE_COL], sort=True, observed=True)[heatmap_col]
+        .last()
+        .unstack(DATE_COL)
+    )
+
+# ---------- 表示用ダウンサンプリング ----------
+MAX_PLOT_COLS = 400
+
+def downsample_pivot(pivot_df: pd.DataFrame, max_cols: int = MAX_PLOT_COLS) -> pd.DataFrame:
+    """
+    日付列数がmax_colsを超える場合、連続する日付をブロック平均で間引きます。
+
+    描画解像度を超える点数をmatplotlibに渡してもレンダリングコストが
+    増えるだけなので、表示直前に列数を抑えます。列ラベルは各ブロックの
+    先頭日付を使います。
+    """
+    n = len(pivot_df.columns)
+    if n <= max_cols:
+        return pivot_df
+    k = -(-n // max_cols)
+    blocks = np.arange(n) // k
+    reduced = pivot_df.T.groupby(blocks).mean().T
+    reduced.columns = pivot_df.columns[::k]
+    return reduced
+
+# ---------- 移動平均カーネル ----------
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _rolling_mean_2d(arr: np.ndarray, window: int) -> np.ndarray:
+        # 行＝台、列＝日付。台方向に並列化。
+        # 移動平均は「直近window回の稼働日（観測値）」に対する平均。
+        # NaN（非稼働日）はウィンドウを進めず、出力もNaNのままにする
+        # （元実装の rolling(window, min_periods=1) と同じ意味論）。
+        out = np.empty_like(arr)
+        for i in numba.prange(arr.shape[0]):
+            buf = np.empty(window)  # 直近window件の観測値のリングバッファ
+            ptr = 0
+            obs = 0
+            s = 0.0
+            for j in range(arr.shape[1]):
+                v = arr[i, j]
+                if np.isnan(v):
+                    out[i, j] = np.nan
+                    continue
+                if obs >= window:
+                    s -= buf[ptr]
+                buf[ptr] = v
+                ptr += 1
+                if ptr == window:
+                    ptr = 0
+                s += v
+                obs += 1
+                out[i, j] = s / (obs if obs < window else window)
+        return out
+
+def rolling_mean_rows(pivot_df: pd.DataFrame, window: int) -> np.ndarray:
+    """
+    ピボットテーブルの各行（台）に対する移動平均をまとめて計算します。
+
+    平均は各台の直近window回の観測値に対するもので、非稼働日（NaN）は
+    ウィンドウに数えません（元実装の台毎rolling + min_periods=1 と同値）。
+    numbaがあればJITカーネル、なければpandasのrollingを使います。
+    """
+    if numba is not None:
+        return _rolling_mean_2d(pivot_df.to_numpy(dtype=np.float64), window)
+
+    def per_row(row: pd.Series) -> pd.Series:
+        obs = row.dropna()
+        return obs.rolling(window=window, min_periods=1).mean().reindex(row.index)
+
+    return pivot_df.apply(per_row, axis=1).to_numpy()
+
 # ---------- ヒートマップ作成関数 ----------
-def plot_heatmap(pivot_df: pd.DataFrame, store: str, model: str, heatmap_col: str) -> plt.Figure:
-    """
-    ピボットテーブルからヒートマップを生成します。
-    """
-    fig, ax = plt.subplots(figsize=(12, 6))
-    custom_cmap = ListedColormap(CUSTOM_COLORS)
-    vmin = pivot_df.min().min()
-    vmax = pivot_df.max().max()
-    im = ax.imshow(pivot_df, aspect="auto", cmap=custom_cmap, interpolation='none', vmin=vmin, vmax=vmax)
-    ax.set_title(f"{store} - {model} の {heatmap_col} 表示（ヒートマップ）")
-    ax.set_xlabel("日付")
-    ax.set_ylabel("台番号")
-    ax.set_xticks(range(len(pivot_df.columns)))
-    ax.set_xticklabels([d.strftime('%m/%d') for d in pivot_df.columns], rotation=90, fontsize=8)
-    ax.set_yticks(range(len(pivot_df.index)))
-    ax.set_yticklabels(pivot_df.index, fontsize=8)
-    cb = fig.colorbar(im, ax=ax)
-    cb.set_label("持玉/差玉の値")
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def plot_heatmap(pivot_df: pd.DataFrame, store: str, model: str, heatmap_col: str) -> go.Figure:
+    """
+    ピボットテーブルからヒートマップを生成します（キャッシュ付き）。
+
+    go.Heatmapはブラウザ側でレンダリングされるため、サーバはFigureの
+    JSONを一度送るだけで済み、リラン毎のAgg描画・PNGエンコードがなくなります。
+    パン・ズームもクライアント側で完結します。
+    """
+    arr = pivot_df.to_numpy(dtype=np.float32)
+    # 10色の離散カラースケール（従来のListedColormapと同じ見た目）
+    n = len(CUSTOM_COLORS)
+    colorscale = []
+    for i, c in enumerate(CUSTOM_COLORS):
+        colorscale += [[i / n, c], [(i + 1) / n, c]]
+    fig = go.Figure(
+        go.Heatmap(
+            z=arr,
+            x=pivot_df.columns.strftime(DATE_FORMAT).tolist(),
+            y=pivot_df.index.tolist(),
+            colorscale=colorscale,
+            colorbar={"title": "持玉/差玉の値"},
+            hoverongaps=False,
+        )
+    )
+    fig.update_layout(
+        title=f"{store} - {model} の {heatmap_col} 表示（ヒートマップ）",
+        xaxis_title="日付",
+        yaxis_title="台番号",
+        yaxis={"autorange": "reversed"},
+        height=500,
+    )
     return fig
 
 # ---------- スパークライン作成関数 ----------
-def plot_sparklines(filtered_df: pd.DataFrame, heatmap_col: str) -> plt.Figure:
+def plot_sparklines(pivot_df: pd.DataFrame) -> plt.Figure:
     """
     各台のスパークライン（小型折れ線グラフ）を生成します。
+
+    計算済みのピボットテーブル（台番号×日付、日付はソート済み）の行を
+    そのまま描画するため、台毎のフィルタやソートは不要です。
+
+    台毎にAxesを作る代わりに、1つのAxes上にセル状に配置した
+    LineCollectionへ全台の線分をまとめて渡します。Axes/Artistの生成が
+    台数に比例しなくなり、描画は系列種別毎の3回のバッチドローで済みます。
     """
-    machine_ids = sorted(filtered_df[MACHINE_COL].unique())
+    machine_ids = pivot_df.index
+    n_machines = len(machine_ids)
     n_cols = 4
-    n_rows = math.ceil(len(machine_ids) / n_cols)
-    fig, axes = plt.subplots(n_rows, n_cols, figsize=(n_cols * 3, n_rows * 2), sharex=True)
-    axes = axes.flatten()
+    n_rows = (n_machines + n_cols - 1) // n_cols
+
+    values = pivot_df.to_numpy(dtype=np.float64)
+    # 移動平均は全台まとめて1回のカーネル呼び出しで計算する（台毎に呼ぶと
+    # ディスパッチコストがM回かかる）。
+    ma7_all = rolling_mean_rows(pivot_df, 7)
+    ma14_all = rolling_mean_rows(pivot_df, 14)
+
+    # 小さな線ばかりなのでdpi=70で十分。PNGエンコードと転送量を抑える。
+    fig, ax = plt.subplots(figsize=(n_cols * 3, n_rows * 2), dpi=70)
+    # セル内のx座標は全台共通（日付の等間隔正規化、左右に5%の余白）
+    x = np.linspace(0.05, 0.95, values.shape[1])
+
+    # セル座標・正規化・線分生成を全台まとめてブロードキャストで計算する
+    # （Pythonループは残さない）。縦は台毎に独立スケール（従来の自動スケールと同等）。
+    idx = np.arange(n_machines)
+    cell_x = idx % n_cols
+    cell_y = n_rows - 1 - idx // n_cols
+    lo = np.nanmin(values, axis=1, keepdims=True)
+    hi = np.nanmax(values, axis=1, keepdims=True)
+    span = np.where(hi > lo, hi - lo, 1.0)
+    xs = cell_x[:, None] + x[None, :]
+
+    def to_segments(series_2d: np.ndarray) -> np.ndarray:
+        ys = cell_y[:, None] + 0.1 + (series_2d - lo) / span * 0.6
+        return np.stack((xs, ys), axis=-1)
 
+    ax.add_collection(LineCollection(to_segments(values), colors=CUSTOM_COLORS[0], linewidths=1))
+    ax.add_collection(
+        LineCollection(to_segments(ma7_all), colors=CUSTOM_COLORS[1], linewidths=0.8, linestyles="--")
+    )
+    ax.add_collection(
+        LineCollection(to_segments(ma14_all), colors=CUSTOM_COLORS[2], linewidths=0.8, linestyles=":")
+    )
     for i, machine_id in enumerate(machine_ids):
-        data = filtered_df[filtered_df[MACHINE_COL] == machine_id].sort_values(DATE_COL)
-        axes[i].plot(data[DATE_COL], data[heatmap_col], color=CUSTOM_COLORS[0], linewidth=1)
-        axes[i].set_title(f"台{machine_id}", fontsize=8)
-        axes[i].tick_params(axis='x', labelsize=6, rotation=45)
-        axes[i].tick_params(axis='y', labelsize=6)
-
-    # 不要な軸は削除
-    for j in range(i + 1, len(axes)):
-        fig.delaxes(axes[j])
+        ax.text(cell_x[i] + 0.5, cell_y[i] + 0.82, f"台{machine_id}", fontsize=8, ha="center")
+
+    # 範囲は確定しているので自動スケーリングは明示的に無効化する
+    ax.autoscale(False)
+    ax.set_xlim(0, n_cols)
+    ax.set_ylim(0, n_rows)
+    ax.set_axis_off()
     fig.tight_layout()
     return fig
 
-# ---------- 移動平均グラフ作成関数 ----------
-def plot_moving_average(target_df: pd.DataFrame, col_ma: str, store: str, model: str, machine: str) -> plt.Figure:
+# ---------- 移動平均グラフ用データ作成関数 ----------
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def precompute_ma(filtered_df: pd.DataFrame, col_ma: str, store: str, model: str) -> tuple:
     """
-    特定の台のデータに対して、7日・14日の移動平均線を重ねた推移グラフを生成します。
+    (機種, 表示列) 毎に、全台のMA7/MA14をピボット上で一括計算して返します。
+
+    台や表示項目を切り替えるたびに1台分ずつ再計算する代わりに、
+    最初の1回で全台分を計算・キャッシュし、以降は行の参照だけにします。
     """
-    ma_df = target_df.copy().sort_values(DATE_COL)
-    ma_df["MA7"] = ma_df[col_ma].rolling(window=7, min_periods=1).mean()
-    ma_df["MA14"] = ma_df[col_ma].rolling(window=14, min_periods=1).mean()
+    pivot_df = build_pivot(filtered_df, col_ma, store, model)
+    ma7_all = pd.DataFrame(
+        rolling_mean_rows(pivot_df, 7), index=pivot_df.index, columns=pivot_df.columns
+    )
+    ma14_all = pd.DataFrame(
+        rolling_mean_rows(pivot_df, 14), index=pivot_df.index, columns=pivot_df.columns
+    )
+    return pivot_df, ma7_all, ma14_all
 
-    fig, ax = plt.subplots(figsize=(10, 4))
-    ax.plot(ma_df[DATE_COL], ma_df[col_ma], label="実データ", marker="o", color=CUSTOM_COLORS[0])
-    ax.plot(ma_df[DATE_COL], ma_df["MA7"], label="7日移動平均", linestyle="--", color=CUSTOM_COLORS[1])
-    ax.plot(ma_df[DATE_COL], ma_df["MA14"], label="14日移動平均", linestyle=":", color=CUSTOM_COLORS[2])
-    ax.set_title(f"{store} - {model} 台{machine} の {col_ma} 推移（移動平均線付き）")
-    ax.set_xlabel("日付")
-    ax.set_ylabel(col_ma)
-    ax.grid(True)
-    ax.legend()
-    return fig
+def build_moving_average_df(
+    filtered_df: pd.DataFrame, col_ma: str, machine, store: str, model: str
+) -> pd.DataFrame:
+    """
+    特定の台の実データと7日・14日移動平均の表示用データフレームを返します。
+
+    描画はst.line_chartに任せるため、ここでは日付をインデックスにした
+    3列（実データ・MA7・MA14）のフレームを作るだけです。中身は
+    precompute_maのキャッシュからの行参照なので、台の切り替えはO(1)です。
+    """
+    pivot_df, ma7_all, ma14_all = precompute_ma(filtered_df, col_ma, store, model)
+    ma_df = pd.DataFrame(
+        {
+            col_ma: pivot_df.loc[machine],
+            "7日移動平均": ma7_all.loc[machine],
+            "14日移動平均": ma14_all.loc[machine],
+        }
+    )
+    # 非稼働日（実データがNaNの日）は従来どおり表示しない
+    return ma_df[ma_df[col_ma].notna()]
 
 def setup_page():
     """Streamlitのページ設定を行います。"""
     st.title("スロットデータビューワー（Google Drive対応版）")
 
 def main():
-    # フォント読み込み（キャッシュ済み）
-    load_font(FONT_URL, FONT_PATH)
-
     # Streamlitページ設定
     setup_page()
 
@@ -149,12 +455,11 @@ def main():
     }
     store = st.sidebar.selectbox("店舗を選択", list(store_files.keys()))
     file_id = store_files[store]
-    url = f"https://drive.google.com/uc?id={file_id}"
 
     # CSVデータ読み込み（ローディング表示＆エラーハンドリング）
     with st.spinner("データ読み込み中..."):
         try:
-            df = load_data(url)
+            df = load_data(file_id)
         except Exception as e:
             st.error(f"CSVの読み込みまたは解析でエラーが発生しました: {e}")
             st.stop()
@@ -167,8 +472,13 @@ def main():
             st.stop()
 
     # サイドバーでその他の選択項目
-    model = st.sidebar.selectbox("機種を選択", sorted(df[MODEL_COL].unique()))
-    filtered_df = df[df[MODEL_COL] == model]
+    # category dtypeならソート済みカテゴリ一覧が既にあるのでO(1)で取れる
+    if isinstance(df[MODEL_COL].dtype, pd.CategoricalDtype):
+        model_options = df[MODEL_COL].cat.categories.tolist()
+    else:
+        model_options = sorted(df[MODEL_COL].unique())
+    model = st.sidebar.selectbox("機種を選択", model_options)
+    filtered_df = filter_by_model(df, model)
     if filtered_df.empty:
         st.error("選択された機種のデータが存在しません。")
         st.stop()
@@ -181,23 +491,24 @@ def main():
         # 店舗により使用する列を切り替え
         heatmap_col = "最大持玉" if store == "メッセ武蔵境" else "最大差玉"
         if heatmap_col in filtered_df.columns:
-            pivot_df = filtered_df.pivot(index=MACHINE_COL, columns=DATE_COL, values=heatmap_col)
+            pivot_df = downsample_pivot(build_pivot(filtered_df, heatmap_col, store, model))
             if visualization_type == "ヒートマップ":
-                fig_heatmap = plot_heatmap(pivot_df, store, model, heatmap_col)
-                st.pyplot(fig_heatmap)
-                plt.close(fig_heatmap)
+                st.plotly_chart(
+                    plot_heatmap(pivot_df, store, model, heatmap_col),
+                    use_container_width=True,
+                )
             else:
-                fig_spark = plot_sparklines(filtered_df, heatmap_col)
-                st.pyplot(fig_spark)
-                plt.close(fig_spark)
+                fig_spark = plot_sparklines(pivot_df)
+                st.pyplot(fig_spark, clear_figure=True)
         else:
             st.warning(f"この店舗では '{heatmap_col}' の列が見つかりませんでした。")
     
     # ---------- セクション②：特定の台の移動平均グラフ ----------
     with st.expander("② 特定の台の移動平均線付き推移グラフ", expanded=True):
         st.subheader("移動平均線を重ねた推移グラフ")
-        machine = st.selectbox("台番号を選択", sorted(filtered_df[MACHINE_COL].unique()))
-        target_df = filtered_df[filtered_df[MACHINE_COL] == machine].sort_values(DATE_COL)
+        machine = st.selectbox("台番号を選択", sorted_machines(filtered_df))
+        # ロード時に日付昇順でソート済みなので、行位置で切り出すだけでよい
+        target_df = filtered_df.iloc[machine_indices(filtered_df)[machine]]
         if target_df.empty:
             st.error("選択された台番号のデータが存在しません。")
         else:
@@ -207,9 +518,8 @@ def main():
                 st.error("表示項目の候補がありません。")
             else:
                 col_ma = st.selectbox("表示項目を選択", col_options, key="ma_col")
-                fig_ma = plot_moving_average(target_df, col_ma, store, model, machine)
-                st.pyplot(fig_ma)
-                plt.close(fig_ma)
+                st.caption(f"{store} - {model} 台{machine} の {col_ma} 推移（移動平均線付き）")
+                st.line_chart(build_moving_average_df(filtered_df, col_ma, machine, store, model))
 
 if __name__ == "__main__":
     main()